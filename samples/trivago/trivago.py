@@ -1139,9 +1139,11 @@ class CreateExplodeWithNoClickIndexDataset(BasePySparkTask):
         df_item = df.select("action_type_item_idx").toPandas()
         df_item = df_item.action_type_item_idx.value_counts()
 
-        # df_item = df_item.to_dict()
-        # df_array = csr_matrix((list(df_item.values), (np.zeros(len(df_item)), list(df_item.index))), shape=(1, np.max(list(df_item.index))+1)).toarray()[0]
-        return df_item.to_dict()
+        # item_idx is a dense integer index, so the counts can be looked up
+        # directly by position (items never clicked count 0)
+        popularity = np.zeros(int(df_item.index.max()) + 1, dtype=np.int64)
+        popularity[df_item.index.values.astype(np.int64)] = df_item.values
+        return popularity
 
     def main(self, sc: SparkContext, *args):
         os.makedirs(DATASET_DIR, exist_ok=True)
@@ -1154,24 +1156,25 @@ class CreateExplodeWithNoClickIndexDataset(BasePySparkTask):
         item_idx_dict = (
             item_idx_df.toPandas().set_index("item_id")["item_idx"].to_dict()
         )
-        item_idx_most_dict = self.most_popular_array(df)
-        print(item_idx_most_dict)
+        item_idx_popularity = self.most_popular_array(df)
+        print(item_idx_popularity)
 
         # Expand impressions interactions
         df = df.withColumn("impressions", to_array_int_udf(df.impressions)).withColumn(
             "prices", to_array_float_udf(df.prices)
         )
 
-        sort_array_by_dict = udf(
-            lambda x: sorted(
-                x,
-                key=lambda _x: item_idx_most_dict[_x]
-                if _x in item_idx_most_dict
-                else 0,
-                reverse=True,
-            ),
-            ArrayType(IntegerType()),
-        )
+        def sort_by_popularity(x):
+            x = np.asarray(x, dtype=np.int64)
+            scores = np.where(
+                x < len(item_idx_popularity),
+                item_idx_popularity[np.minimum(x, len(item_idx_popularity) - 1)],
+                0,
+            )
+            # Stable, so ties keep their impression order like sorted(reverse=True)
+            return x[np.argsort(-scores, kind="stable")].tolist()
+
+        sort_array_by_dict = udf(sort_by_popularity, ArrayType(IntegerType()))
         df = df.withColumn("list_mean_price", array_mean(df.prices))
 
         # Convert item_id to item_idx in impressions
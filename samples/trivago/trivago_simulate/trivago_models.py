@@ -1,4 +1,3 @@
-from multiprocessing import Pool
 from typing import Union, Tuple, Optional, List
 import os
 import json
@@ -127,8 +126,7 @@ class TrivagoModelTraining(
         if not hasattr(self, "_train_data_frame"):
             self._train_data_frame_indexed = True  # To delay the index mapping
             self._train_data_frame = super().train_data_frame
-            with Pool(max(os.cpu_count(), 10)) as p:
-                self.fill_ps(self._train_data_frame, p)
+            self.fill_ps(self._train_data_frame)
             del self._train_data_frame_indexed
         return super().train_data_frame  # To invoke the index mapping if necessary
 
@@ -137,8 +135,7 @@ class TrivagoModelTraining(
         if not hasattr(self, "_val_data_frame"):
             self._val_data_frame_indexed = True  # To delay the index mapping
             self._val_data_frame = super().val_data_frame
-            with Pool(max(os.cpu_count(), 10)) as p:
-                self.fill_ps(self._val_data_frame, p)
+            self.fill_ps(self._val_data_frame)
             del self._val_data_frame_indexed
         return super().val_data_frame  # To invoke the index mapping if necessary
 
@@ -1,24 +1,39 @@
 from typing import Tuple, List, Union, Optional, Dict, Any
 
 import functools
+import os
+from multiprocessing.pool import Pool
+
 import numpy as np
 import pandas as pd
-import random
+import torch
 from torch.utils.data import Dataset
 
 from mars_gym.meta_config import ProjectConfig, IOType, Column
 from mars_gym.utils.index_mapping import map_array
-from mars_gym.utils.utils import parallel_literal_eval
+from mars_gym.utils.utils import parallel_literal_eval, pad_lists
 
 
-def literal_eval_array_columns(data_frame: pd.DataFrame, columns: List[Column]):
-    for column in columns:
-        if (
-            column.type
-            in (IOType.FLOAT_ARRAY, IOType.INT_ARRAY, IOType.INDEXABLE_ARRAY)
-            and column.name in data_frame
-        ):
-            data_frame[column.name] = parallel_literal_eval(data_frame[column.name])
+def literal_eval_array_columns(
+    data_frame: pd.DataFrame,
+    columns: List[Column],
+    extra_column_names: List[str] = [],
+):
+    array_column_names = [
+        column.name
+        for column in columns
+        if column.type in (IOType.FLOAT_ARRAY, IOType.INT_ARRAY, IOType.INDEXABLE_ARRAY)
+        and column.name in data_frame
+    ] + [column_name for column_name in extra_column_names if column_name in data_frame]
+    if not array_column_names or len(data_frame) == 0:
+        return
+
+    # A single pool for all the columns instead of a new one per column
+    with Pool(os.cpu_count()) as pool:
+        for column_name in array_column_names:
+            data_frame[column_name] = parallel_literal_eval(
+                data_frame[column_name], pool
+            )
 
 
 def preprocess_interactions_data_frame(
@@ -32,6 +47,14 @@ def preprocess_interactions_data_frame(
     data_frame[project_config.item_column.name] = data_frame[
         project_config.item_column.name
     ].astype(str)
+    available_arms_column_names = (
+        [project_config.available_arms_column_name]
+        if project_config.available_arms_column_name
+        and isinstance(
+            data_frame.iloc[0][project_config.available_arms_column_name], str
+        )
+        else []
+    )
     literal_eval_array_columns(
         data_frame,
         [
@@ -41,13 +64,8 @@ def preprocess_interactions_data_frame(
         ]
         + [input_column for input_column in project_config.other_input_columns]\
         + [input_column for input_column in project_config.auxiliar_output_columns],
+        extra_column_names=available_arms_column_names,
     )
-    if project_config.available_arms_column_name and isinstance(
-        data_frame.iloc[0][project_config.available_arms_column_name], str
-    ):
-        data_frame[project_config.available_arms_column_name] = parallel_literal_eval(
-            data_frame[project_config.available_arms_column_name]
-        )
 
     return data_frame
 
@@ -72,8 +90,13 @@ def preprocess_metadata_data_frame(
     embeddings_for_metadata: Dict[str, np.ndarray] = {}
     for metadata_column in project_config.metadata_columns:
 
-        emb = metadata_data_frame[metadata_column.name].values.tolist()
-        embedding = np.array(emb, dtype=metadata_column.type.dtype)
+        values = metadata_data_frame[metadata_column.name].values
+        # Array columns are stacked straight from the object array, without
+        # going through an intermediate list of lists
+        embedding = np.ascontiguousarray(
+            np.stack(values) if len(values) and values.dtype == object else values,
+            dtype=metadata_column.type.dtype,
+        )
         pad = np.zeros((2,) + embedding.shape[1:])
         #
         embedding = np.concatenate((pad, embedding))
@@ -89,13 +112,6 @@ def _rand_int_except(low: int, high: int, exception: int) -> int:
             return number
 
 
-def _choose_except(values: list, exception: Any) -> int:
-    while True:
-        value = random.choice(values)
-        if value != exception:
-            return value
-
-
 class InteractionsDataset(Dataset):
     def __init__(
         self,
@@ -118,18 +134,43 @@ class InteractionsDataset(Dataset):
             auxiliar_output_column.name
             for auxiliar_output_column in project_config.auxiliar_output_columns
         ]
-        self._data_frame = data_frame[
-            set(
+        # Each column is kept as its own array, so a batch is one fancy-index per
+        # column instead of a DataFrame.iloc over all of them
+        self._columns: Dict[str, np.ndarray] = {
+            column_name: np.ascontiguousarray(data_frame[column_name].values)
+            for column_name in set(
                 input_column_names
                 + [project_config.output_column.name]
                 + auxiliar_output_column_names
             ).intersection(data_frame.columns)
-        ]
+        }
+        self._length = len(data_frame)
         self._embeddings_for_metadata = embeddings_for_metadata
-        # from IPython import embed; embed()
+
+        # Convert the dtypes once here instead of on every batch. Columns that
+        # can't be turned into a regular array (e.g. ragged lists) are still
+        # converted per batch
+        self._converted_column_names = set()
+        for column in (
+            self._input_columns
+            + [project_config.output_column]
+            + list(project_config.auxiliar_output_columns)
+        ):
+            if (
+                column.name not in self._columns
+                or column.name in self._converted_column_names
+            ):
+                continue
+            try:
+                converted = self._convert_dtype(self._columns[column.name], column.type)
+            except (ValueError, TypeError):
+                continue
+            if converted.dtype != object:
+                self._columns[column.name] = converted
+                self._converted_column_names.add(column.name)
 
     def __len__(self) -> int:
-        return self._data_frame.shape[0]
+        return self._length
 
     def _convert_dtype(self, value: np.ndarray, type: IOType) -> np.ndarray:
         if type == IOType.INDEXABLE:
@@ -142,16 +183,22 @@ class InteractionsDataset(Dataset):
             return np.array([np.array(v, dtype=np.float64) for v in value])
         return value
 
+    def _get_column(
+        self, column: Column, indices: Union[List[int], slice]
+    ) -> np.ndarray:
+        values = self._columns[column.name][indices]
+        if column.name in self._converted_column_names:
+            return values
+        return self._convert_dtype(values, column.type)
+
     def __getitem__(
         self, indices: Union[int, List[int], slice]
     ) -> Tuple[Tuple[np.ndarray, ...], Union[np.ndarray, Tuple[np.ndarray, ...]]]:
         if isinstance(indices, int):
             indices = [indices]
-        rows: pd.Series = self._data_frame.iloc[indices]
 
         inputs = tuple(
-            self._convert_dtype(rows[column.name].values, column.type)
-            for column in self._input_columns
+            self._get_column(column, indices) for column in self._input_columns
         )
         if (
             self._project_config.item_is_input
@@ -163,13 +210,10 @@ class InteractionsDataset(Dataset):
                 for column in self._project_config.metadata_columns
             )
 
-        output = self._convert_dtype(
-            rows[self._project_config.output_column.name].values,
-            self._project_config.output_column.type,
-        )
+        output = self._get_column(self._project_config.output_column, indices)
         if self._project_config.auxiliar_output_columns:
             output = tuple([output]) + tuple(
-                self._convert_dtype(rows[column.name].values, column.type)
+                self._get_column(column, indices)
                 for column in self._project_config.auxiliar_output_columns
             )
         # print(inputs)
@@ -272,8 +316,18 @@ class InteractionsWithNegativeItemGenerationByAvailableItemsDataset(
         # data_frame = data_frame[data_frame[project_config.output_column.name] > 0]
 
         assert project_config.available_arms_column_name in data_frame
-        self._available_items = data_frame[project_config.available_arms_column_name].map(
-            functools.partial(map_array, mapping=index_mapping[project_config.item_column.name])).values
+        # Padded (n, max_available) array plus lengths, so negatives for a whole
+        # batch are drawn with a single gather
+        self._available_items, self._n_available_items = pad_lists(
+            data_frame[project_config.available_arms_column_name]
+            .map(
+                functools.partial(
+                    map_array, mapping=index_mapping[project_config.item_column.name]
+                )
+            )
+            .values,
+            dtype=np.int64,
+        )
 
         super().__init__(
             data_frame,
@@ -290,6 +344,26 @@ class InteractionsWithNegativeItemGenerationByAvailableItemsDataset(
             (1 / (1 - self._negative_proportion) - 1) * super().__len__()
         )
 
+    def _choose_available_items_except(
+        self, indices: np.ndarray, exceptions: np.ndarray
+    ) -> np.ndarray:
+        if (self._n_available_items[indices] == 0).any():
+            raise IndexError("Cannot choose from an empty sequence")
+
+        items = np.empty(len(indices), dtype=np.int64)
+        pending = np.arange(len(indices))
+        while len(pending) > 0:
+            rows = indices[pending]
+            # Drawn with torch, not np.random: the DataLoader reseeds torch in every
+            # worker, while forked workers would all share the same NumPy state
+            positions = (
+                torch.rand(len(pending), dtype=torch.float64).numpy()
+                * self._n_available_items[rows]
+            ).astype(np.int64)
+            items[pending] = self._available_items[rows, positions]
+            pending = pending[items[pending] == exceptions[pending]]
+        return items
+
     def __getitem__(
         self, indices: Union[int, List[int], slice]
     ) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
@@ -313,11 +387,9 @@ class InteractionsWithNegativeItemGenerationByAvailableItemsDataset(
             )
 
             negative_input = list(negative_input)
-            negative_input[self._item_input_index] = np.array(
-                [
-                    _choose_except(self._available_items[index], item_idx)
-                    for index, item_idx in zip(negative_indices, negative_input[self._item_input_index])
-                ]
+            negative_input[self._item_input_index] = self._choose_available_items_except(
+                np.array(negative_indices, dtype=np.int64),
+                negative_input[self._item_input_index],
             )
             negative_input = tuple(negative_input)
 
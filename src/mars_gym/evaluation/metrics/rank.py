@@ -252,6 +252,97 @@ def ndcg_at_k(r, k, method=0):
     return dcg_at_k(r, k, method) / dcg_max
 
 
+def _dcg_weights(size, method=0):
+    if method == 0:
+        return np.concatenate([[1.0], 1.0 / np.log2(np.arange(2, size + 1))])[:size]
+    elif method == 1:
+        return 1.0 / np.log2(np.arange(2, size + 2))
+    else:
+        raise ValueError("method must be 0 or 1.")
+
+
+def reciprocal_rank_batch(rs):
+    """Score is reciprocal of the rank of the first relevant item, for each row
+    Relevance is binary (nonzero is relevant).
+    >>> rs = np.array([[0, 0, 1], [0, 1, 0], [0, 0, 0]])
+    >>> reciprocal_rank_batch(rs)
+    array([0.33333333, 0.5       , 0.        ])
+    Args:
+        rs: 2D array of relevance scores in rank order, one row per list
+            (zero-padded on the right)
+    Returns:
+        Reciprocal rank of each row
+    """
+    rs = np.asarray(rs) != 0
+    if rs.shape[1] == 0:
+        return np.zeros(rs.shape[0])
+    return np.where(rs.any(axis=1), 1.0 / (rs.argmax(axis=1) + 1), 0.0)
+
+
+def precision_at_k_batch(rs, k):
+    """Score is precision @ k, for each row
+    Relevance is binary (nonzero is relevant).
+    >>> rs = np.array([[0, 0, 1], [1, 0, 0]])
+    >>> precision_at_k_batch(rs, 1)
+    array([0., 1.])
+    Args:
+        rs: 2D array of relevance scores in rank order, one row per list
+            (zero-padded on the right)
+    Returns:
+        Precision @ k of each row
+    Raises:
+        ValueError: rs.shape[1] must be >= k
+    """
+    assert k >= 1
+    rs = np.asarray(rs)
+    if len(rs) and rs.shape[1] < k:
+        raise ValueError("Relevance score length < k")
+    return np.mean(rs[:, :k] != 0, axis=1)
+
+
+def average_precision_batch(rs):
+    """Score is average precision (area under PR curve), for each row
+    Relevance is binary (nonzero is relevant).
+    >>> rs = np.array([[1, 1, 0, 1, 0, 1, 0, 0, 0, 1]])
+    >>> average_precision_batch(rs)
+    array([0.78333333])
+    Args:
+        rs: 2D array of relevance scores in rank order, one row per list
+            (zero-padded on the right)
+    Returns:
+        Average precision of each row
+    """
+    rs = np.asarray(rs) != 0
+    precisions = np.cumsum(rs, axis=1) / np.arange(1, rs.shape[1] + 1)
+    n_relevant = rs.sum(axis=1)
+    return (precisions * rs).sum(axis=1) / np.maximum(n_relevant, 1)
+
+
+def ndcg_at_k_batch(rs, k, method=0):
+    """Score is normalized discounted cumulative gain (ndcg), for each row
+    Relevance is positive real values.  Can use binary
+    as the previous methods.
+    >>> rs = np.array([[2, 1, 2, 0], [0, 0, 0, 0]])
+    >>> ndcg_at_k_batch(rs, 4)
+    array([0.92030321, 0.        ])
+    Args:
+        rs: 2D array of relevance scores in rank order, one row per list
+            (zero-padded on the right)
+        k: Number of results to consider
+        method: If 0 then weights are [1.0, 1.0, 0.6309, 0.5, 0.4307, ...]
+                If 1 then weights are [1.0, 0.6309, 0.5, 0.4307, ...]
+    Returns:
+        Normalized discounted cumulative gain of each row
+    """
+    rs = np.asarray(rs, dtype=np.float64)
+    ideal_rs = -np.sort(-rs, axis=1)[:, :k]
+    rs = rs[:, :k]
+    weights = _dcg_weights(rs.shape[1], method)
+    dcg = rs @ weights
+    dcg_max = ideal_rs @ weights
+    return np.divide(dcg, dcg_max, out=np.zeros_like(dcg), where=dcg_max != 0)
+
+
 def prediction_coverage(predicted: List[list], catalog: list) -> float:
     """
     Forked from https://github.com/statisticianinstilettos/recmetrics
@@ -1,12 +1,10 @@
 import abc
-from multiprocessing import Pool
 
 import numpy as np
 import pandas as pd
 import torch
 import torchbearer
 from torchbearer import Trial
-from tqdm import tqdm
 from typing import List
 import functools
 
@@ -21,6 +19,7 @@ from mars_gym.data.dataset import (
 from mars_gym.utils.index_mapping import (
     map_array,
 )
+from mars_gym.utils.utils import pad_lists
 class FillPropensityScoreMixin(object, metaclass=abc.ABCMeta):
     @property
     @abc.abstractmethod
@@ -42,7 +41,7 @@ class FillPropensityScoreMixin(object, metaclass=abc.ABCMeta):
     def propensity_score_column(self) -> str:
         pass
 
-    def fill_ps(self, df: pd.DataFrame, pool: Pool):
+    def fill_ps(self, df: pd.DataFrame):
         policy_estimator_df = preprocess_interactions_data_frame(df.copy(), self.policy_estimator.project_config)
         transform_with_indexing(
             policy_estimator_df,
@@ -71,7 +70,12 @@ class FillPropensityScoreMixin(object, metaclass=abc.ABCMeta):
         batch_sampler = FasterBatchSampler(
             dataset, self.policy_estimator.batch_size, shuffle=False
         )
-        data_loader = NoAutoCollationDataLoader(dataset, batch_sampler=batch_sampler)
+        data_loader = NoAutoCollationDataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            num_workers=self.policy_estimator.generator_workers,
+            pin_memory=True if self.policy_estimator.device == "cuda" else False,
+        )
         #from IPython import embed
         #embed()
         trial = (
@@ -92,24 +96,33 @@ class FillPropensityScoreMixin(object, metaclass=abc.ABCMeta):
             )
         probas: np.ndarray = torch.exp(log_probas).cpu().numpy()
 
-        item_indices = policy_estimator_df[self.item_column]
+        item_indices = policy_estimator_df[self.item_column].values
 
-        params = (
-            zip(item_indices, probas, policy_estimator_df[self.available_arms_column])
+        df[self.propensity_score_column] = _get_ps_from_probas(
+            item_indices,
+            probas,
+            policy_estimator_df[self.available_arms_column]
             if self.available_arms_column
-            else zip(item_indices, probas)
-        )
-
-
-        # from IPython import embed; embed()
-        df[self.propensity_score_column] = list(
-            tqdm(pool.starmap(_get_ps_from_probas, params), total=len(df))
+            else None,
         )
 
 
 def _get_ps_from_probas(
-    item_idx: int, probas: np.ndarray, available_item_indices: List[int] = None
-) -> float:
-    if available_item_indices:
-        probas /= np.sum(probas[available_item_indices])
-    return probas[item_idx]
+    item_indices: np.ndarray,
+    probas: np.ndarray,
+    available_item_indices_list: List[List[int]] = None,
+) -> np.ndarray:
+    ps = probas[np.arange(len(probas)), item_indices]
+    if available_item_indices_list is not None:
+        available_item_indices, lengths = pad_lists(
+            available_item_indices_list, dtype=np.int64
+        )
+        available_probas = np.take_along_axis(probas, available_item_indices, axis=1)
+        available_probas[
+            np.arange(available_item_indices.shape[1]) >= lengths[:, None]
+        ] = 0.0
+        # Rows without available items are kept unnormalized
+        normalization = available_probas.sum(axis=1)
+        normalization[lengths == 0] = 1.0
+        ps = ps / normalization
+    return ps
@@ -1,7 +1,5 @@
-import functools
 import json
 import os
-from multiprocessing.pool import Pool
 from typing import List, Tuple, Type, Any
 import pprint
 
@@ -12,7 +10,6 @@ import pandas as pd
 import torch
 import torchbearer
 from torchbearer import Trial
-from tqdm import tqdm
 import gc
 from mars_gym.data.dataset import (
     preprocess_interactions_data_frame,
@@ -29,10 +26,9 @@ from mars_gym.evaluation.metrics.offpolicy import (
     eval_doubly_robust,
 )
 from mars_gym.evaluation.metrics.rank import (
-    mean_reciprocal_rank,
-    average_precision,
-    precision_at_k,
-    ndcg_at_k,
+    average_precision_batch,
+    precision_at_k_batch,
+    ndcg_at_k_batch,
     personalization_at_k,
     prediction_coverage_at_k,
 )
@@ -43,7 +39,7 @@ from mars_gym.simulation.training import (
 from mars_gym.evaluation.policy_estimator import PolicyEstimatorTraining
 from mars_gym.torch.data import FasterBatchSampler, NoAutoCollationDataLoader
 from mars_gym.utils.reflection import load_attr, get_attribute_names
-from mars_gym.utils.utils import parallel_literal_eval, JsonEncoder
+from mars_gym.utils.utils import fast_literal_eval_if_str, pad_lists, JsonEncoder
 from mars_gym.utils.index_mapping import (
     create_index_mapping,
     create_index_mapping_from_arrays,
@@ -191,10 +187,11 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
     def get_catalog(self, df: pd.DataFrame) -> str:
         indexed_list = list(self.model_training.index_mapping[self.model_training.project_config.item_column.name].keys())
         indexed_list = [x for x in indexed_list if x is not None and str(x) != 'nan']
-        test_list    = list(df["sorted_actions"])
-        test_list.append(indexed_list)
+        # explode flattens every ranking in pandas' C code; the previous
+        # sum(list_of_lists, []) was quadratic in the number of rows
+        test_items = df["sorted_actions"].explode().dropna()
 
-        all_items = sum(test_list, [])
+        all_items = np.array(test_items.tolist() + indexed_list)
         unique_items = list(np.unique(all_items))
         return unique_items
 
@@ -213,30 +210,18 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
             dtype = {self.model_training.project_config.item_column.name : "str"}
         )  # .sample(10000)
 
-        df["sorted_actions"] = parallel_literal_eval(df["sorted_actions"])
-        df["prob_actions"]   = parallel_literal_eval(df["prob_actions"])
-        df["action_scores"]  = parallel_literal_eval(df["action_scores"])
+        for column in ("sorted_actions", "prob_actions", "action_scores"):
+            df[column] = [fast_literal_eval_if_str(value) for value in df[column]]
 
         df["action"] = df["sorted_actions"].apply(
             lambda sorted_actions: str(sorted_actions[0])
         )
 
-        with Pool(self.num_processes) as p:
-            print("Creating the relevance lists...")
-            # from IPython import embed; embed()
-            df["relevance_list"] = list(
-                tqdm(
-                    p.starmap(
-                        _create_relevance_list,
-                        zip(
-                            df["sorted_actions"],
-                            df[self.model_training.project_config.item_column.name],
-                            df[self.model_training.project_config.output_column.name],
-                        ),
-                    ),
-                    total=len(df),
-                )
-            )
+        print("Creating the relevance lists...")
+        df["relevance_list"] = _create_relevance_lists(
+            df["sorted_actions"],
+            df[self.model_training.project_config.item_column.name],
+        )
         
         
         if self.model_training.metadata_data_frame is not None:
@@ -292,65 +277,28 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
         df = df.copy()
 
         # Filter only disponível interaction 
-        df = df[df.relevance_list.apply(max) > 0]
+        df = df[
+            np.fromiter(
+                (1 in relevance_list for relevance_list in df["relevance_list"]),
+                dtype=bool,
+                count=len(df),
+            )
+        ]
 
         # Filter only new interactions, them not appear in trained dataset
         if self.only_new_interactions:
             df = df[df['trained'] == 0]
 
-        with Pool(self.num_processes) as p:
-            print("Calculating average precision...")
-            df["average_precision"] = list(
-                tqdm(p.map(average_precision, df["relevance_list"]), total=len(df))
-            )
-            print("Calculating mean reciprocal rank...")
-            df["MRR"] = list(
-                tqdm(p.map(mean_reciprocal_rank, df["relevance_list"]), total=len(df))
-            )
-
-            print("Calculating precision at 1...")
-            df["precision_at_1"] = list(
-                tqdm(
-                    p.map(functools.partial(precision_at_k, k=1), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
+        print("Calculating rank metrics...")
+        relevances, lengths = pad_lists(df["relevance_list"], dtype=np.int8)
 
-            print("Calculating nDCG at 5...")
-            df["ndcg_at_5"] = list(
-                tqdm(
-                    p.map(functools.partial(ndcg_at_k, k=5), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
-            print("Calculating nDCG at 10...")
-            df["ndcg_at_10"] = list(
-                tqdm(
-                    p.map(functools.partial(ndcg_at_k, k=10), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
-            print("Calculating nDCG at 15...")
-            df["ndcg_at_15"] = list(
-                tqdm(
-                    p.map(functools.partial(ndcg_at_k, k=15), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
-            print("Calculating nDCG at 20...")
-            df["ndcg_at_20"] = list(
-                tqdm(
-                    p.map(functools.partial(ndcg_at_k, k=20), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
-            print("Calculating nDCG at 50...")
-            df["ndcg_at_50"] = list(
-                tqdm(
-                    p.map(functools.partial(ndcg_at_k, k=50), df["relevance_list"]),
-                    total=len(df),
-                )
-            )
+        df["average_precision"] = average_precision_batch(relevances)
+        # Same values as mean_reciprocal_rank(relevance_list), which scores each
+        # element of the list as its own ranking
+        df["MRR"] = np.count_nonzero(relevances, axis=1) / lengths
+        df["precision_at_1"] = precision_at_k_batch(relevances, 1)
+        for k in (5, 10, 15, 20, 50):
+            df["ndcg_at_%d" % k] = ndcg_at_k_batch(relevances, k)
         #
         catalog = self.get_catalog(df)
         
@@ -394,48 +342,40 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
             return pd.DataFrame(), metrics
         
         df["rewards"] = df[self.model_training.project_config.output_column.name]
-        with Pool(self.num_processes) as p:
-            self.fill_rhat_rewards(df, p)
-            self.fill_ps(df, p)
-            self.fill_item_rhat_rewards(df)
-
-            print("Calculate ps policy eval...")
-            df["ps_eval"] = list(
-                tqdm(
-                    p.starmap(
-                        _ps_policy_eval, zip(df["relevance_list"], df["prob_actions"])
-                    ),
-                    total=len(df),
-                )
-            )
+        self.fill_rhat_rewards(df)
+        self.fill_ps(df)
+        self.fill_item_rhat_rewards(df)
 
-            (
-                action_rhat_rewards,
-                item_idx_rhat_rewards,
-                rewards,
-                ps_eval,
-                ps_eval_i,
-                ps,
-            ) = self._offpolicy_eval(df)
-
-
-            ips, c_ips = eval_IPS(rewards, ps_eval_i, ps)
-            cips, c_cips = eval_CIPS(rewards, ps_eval_i, ps, cap=self.eval_cips_cap)
-            snips, c_snips = eval_SNIPS(rewards, ps_eval_i, ps)
-            doubly, c_doubly = eval_doubly_robust(
-                action_rhat_rewards, item_idx_rhat_rewards, rewards, ps_eval_i, ps
-            )
+        print("Calculate ps policy eval...")
+        df["ps_eval"] = _ps_policy_eval(df["relevance_list"], df["prob_actions"])
 
-            metrics["IPS"] = ips
-            metrics["IPS_C"] = c_ips
-            metrics["CIPS"] = cips
-            metrics["CIPS_C"] = c_cips
-            metrics["SNIPS"] = snips
-            metrics["SNIPS_C"] = c_snips
+        (
+            action_rhat_rewards,
+            item_idx_rhat_rewards,
+            rewards,
+            ps_eval,
+            ps_eval_i,
+            ps,
+        ) = self._offpolicy_eval(df)
+
+
+        ips, c_ips = eval_IPS(rewards, ps_eval_i, ps)
+        cips, c_cips = eval_CIPS(rewards, ps_eval_i, ps, cap=self.eval_cips_cap)
+        snips, c_snips = eval_SNIPS(rewards, ps_eval_i, ps)
+        doubly, c_doubly = eval_doubly_robust(
+            action_rhat_rewards, item_idx_rhat_rewards, rewards, ps_eval_i, ps
+        )
+
+        metrics["IPS"] = ips
+        metrics["IPS_C"] = c_ips
+        metrics["CIPS"] = cips
+        metrics["CIPS_C"] = c_cips
+        metrics["SNIPS"] = snips
+        metrics["SNIPS_C"] = c_snips
 
-            metrics["DirectEstimator"] = np.mean(action_rhat_rewards)
-            metrics["DoublyRobust"] = doubly
-            metrics["DoublyRobust_C"] = c_doubly
+        metrics["DirectEstimator"] = np.mean(action_rhat_rewards)
+        metrics["DoublyRobust"] = doubly
+        metrics["DoublyRobust_C"] = c_doubly
 
         return df, metrics
 
@@ -472,7 +412,7 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
 
         return fairness_df, fairness_metrics
 
-    def fill_rhat_rewards(self, df: pd.DataFrame, pool: Pool):
+    def fill_rhat_rewards(self, df: pd.DataFrame):
         # from IPython import embed; embed()
 
         # df['item_idx_action'] item_idx_action
@@ -527,7 +467,12 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
         batch_sampler = FasterBatchSampler(
             dataset, self.direct_estimator.batch_size, shuffle=False
         )
-        data_loader = NoAutoCollationDataLoader(dataset, batch_sampler=batch_sampler)
+        data_loader = NoAutoCollationDataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            num_workers=self.direct_estimator.generator_workers,
+            pin_memory=True if self.direct_estimator.device == "cuda" else False,
+        )
 
         trial = (
             Trial(
@@ -559,13 +504,10 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
 
         rewards = df_offpolicy["rewards"].values
         ps_eval = df_offpolicy["ps_eval"].values
-        ps_eval_i = df_offpolicy.apply(
-            lambda row: int(
-                row[self.model_training.project_config.item_column.name]
-                == row["action"]
-            ),
-            axis=1,
-        )
+        ps_eval_i = (
+            df_offpolicy[self.model_training.project_config.item_column.name].values
+            == df_offpolicy["action"].values
+        ).astype(int)
 
         ps = df_offpolicy[ps_column].values
         action_rhat_rewards = df_offpolicy["action_rhat_rewards"].values
@@ -581,18 +523,44 @@ class EvaluateTestSetPredictions(FillPropensityScoreMixin, BaseEvaluationTask):
         )
 
 
-def _create_relevance_list(
-    sorted_actions: List[Any], expected_action: Any, reward: int
-) -> List[int]:
-    return [1 if str(action) == str(expected_action) else 0 for action in sorted_actions]
+def _create_relevance_lists(
+    sorted_actions_list: List[List[Any]], expected_actions: List[Any]
+) -> List[List[int]]:
+    if len(sorted_actions_list) == 0:
+        return []
+
+    # Flatten every ranking into one array and compare it against the expected
+    # action repeated once per ranked position, instead of one comparison per row
+    lengths = np.fromiter(
+        (len(sorted_actions) for sorted_actions in sorted_actions_list),
+        dtype=np.int64,
+        count=len(sorted_actions_list),
+    )
+    actions = np.array(
+        [action for sorted_actions in sorted_actions_list for action in sorted_actions],
+        dtype=str,
+    )
+    expected = np.repeat(np.asarray(expected_actions, dtype=str), lengths)
+
+    relevances = (actions == expected).astype(np.int64)
+
+    return [
+        relevance_list.tolist()
+        for relevance_list in np.split(relevances, np.cumsum(lengths)[:-1])
+    ]
 
 
 def _ps_policy_eval(
-    relevance_list: List[int], prob_actions: List[float]
-) -> List[float]:
-    return np.sum(
-        np.array(relevance_list) * np.array(prob_actions[: len(relevance_list)])
-    ).tolist()
+    relevance_lists: List[List[int]], prob_actions_list: List[List[float]]
+) -> np.ndarray:
+    relevances, lengths = pad_lists(relevance_lists)
+    prob_actions, _ = pad_lists(
+        [
+            prob_actions[:length]
+            for prob_actions, length in zip(prob_actions_list, lengths)
+        ]
+    )
+    return (relevances * prob_actions).sum(axis=1)
 
 
 def _get_rhat_scores(
@@ -46,8 +46,9 @@ class BanditPolicy(object, metaclass=abc.ABCMeta):
     ) -> List[float]:
         if self.reward_model:
             inputs: torch.Tensor = default_convert(arm_contexts)
-            scores: torch.Tensor = self.reward_model(*inputs)
-            return scores.detach().cpu().numpy().tolist()
+            with torch.no_grad():
+                scores: torch.Tensor = self.reward_model(*inputs)
+            return scores.cpu().numpy().tolist()
         else:
             return list(np.zeros(len(arm_indices)))
 
@@ -83,6 +83,7 @@ from mars_gym.utils.index_mapping import (
 from mars_gym.utils.plot import plot_history
 from mars_gym.utils import files
 from mars_gym.utils.reflection import load_attr
+from mars_gym.utils.utils import pad_lists
 
 logging.basicConfig(
     format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
@@ -744,26 +745,32 @@ class SupervisedModelTraining(TorchModelTraining):
             # arms = list(np.unique(arms))
         return arms
 
+    def _get_scoring_trial(self, reward_model: nn.Module) -> Trial:
+        # Scoring runs once per interaction, so the Trial is only rebuilt (and the
+        # module only moved to the device) when the reward model is replaced
+        if getattr(self, "_scoring_trial_module", None) is not reward_model:
+            self._scoring_trial = Trial(
+                reward_model,
+                criterion=lambda *args: torch.zeros(
+                    1, device=self.torch_device, requires_grad=True
+                ),
+            ).to(self.torch_device)
+            self._scoring_trial_module = reward_model
+        return self._scoring_trial.eval()
+
     def _get_arm_scores(self, agent: BanditAgent, ob_dataset: Dataset) -> List[float]:
         batch_sampler = FasterBatchSampler(ob_dataset, self.batch_size, shuffle=False)
         generator = NoAutoCollationDataLoader(
             ob_dataset,
             batch_sampler=batch_sampler,
-            num_workers=self.generator_workers,
+            # Starting worker processes costs more than a single batch takes
+            num_workers=self.generator_workers if len(batch_sampler) > 1 else 0,
             pin_memory=self.pin_memory if self.device == "cuda" else False,
         )
 
-        trial = (
-            Trial(
-                agent.bandit.reward_model,
-                criterion=lambda *args: torch.zeros(
-                    1, device=self.torch_device, requires_grad=True
-                ),
-            )
-            .with_test_generator(generator)
-            .to(self.torch_device)
-            .eval()
-        )
+        trial = self._get_scoring_trial(
+            agent.bandit.reward_model
+        ).with_test_generator(generator)
 
         with torch.no_grad():
             model_output: Union[torch.Tensor, Tuple[torch.Tensor]] = trial.predict(
@@ -784,14 +791,20 @@ class SupervisedModelTraining(TorchModelTraining):
         figure.savefig(os.path.join(self.output().path, "scores.png"))
         plt.close(figure)
 
-    def _create_ob_data_frame(self, ob: dict, arm_indices: List[int]) -> pd.DataFrame:
-        data = [
-            {**ob, self.project_config.item_column.name: arm_index}
-            for arm_index in arm_indices
-        ]
-        ob_df = pd.DataFrame(
-            columns=self.obs_columns + [self.project_config.item_column.name], data=data
+    def _create_obs_data_frame(
+        self, obs: List[Dict[str, Any]], arm_indices_list: List[List[int]]
+    ) -> pd.DataFrame:
+        # One row per (ob, arm): repeat each ob once per arm instead of building
+        # a separate DataFrame for every ob
+        lengths = [len(arm_indices) for arm_indices in arm_indices_list]
+        ob_df = (
+            pd.DataFrame(obs, columns=self.obs_columns)
+            .iloc[np.repeat(np.arange(len(obs)), lengths)]
+            .reset_index(drop=True)
         )
+        ob_df[self.project_config.item_column.name] = [
+            arm_index for arm_indices in arm_indices_list for arm_index in arm_indices
+        ]
 
         ob_df = self._fill_hist_columns(ob_df)
 
@@ -835,30 +848,27 @@ class SupervisedModelTraining(TorchModelTraining):
         else:
             arm_indices_list = cast(List[List[int]], arms_list)
 
-        ob_dfs = [
-            self._create_ob_data_frame(ob, arm_indices)
-            for ob, arm_indices in zip(obs, arm_indices_list)
-        ]
         obs_dataset = InteractionsDataset(
-            pd.concat(ob_dfs),
+            self._create_obs_data_frame(obs, arm_indices_list),
             obs[0][ITEM_METADATA_KEY],
             self.project_config,
             self.index_mapping,
         )
 
-        arm_contexts_list: List[Tuple[np.ndarray, ...]] = []
-        i = 0
-        for ob_df in ob_dfs:
-            arm_contexts_list.append(obs_dataset[i : i + len(ob_df)][0])
-            i += len(ob_df)
+        offsets = np.cumsum(
+            [0] + [len(arm_indices) for arm_indices in arm_indices_list]
+        ).tolist()
+
+        arm_contexts_list: List[Tuple[np.ndarray, ...]] = [
+            obs_dataset[start:end][0] for start, end in zip(offsets[:-1], offsets[1:])
+        ]
 
         if agent.bandit.reward_model:
             all_arm_scores = self._get_arm_scores(agent, obs_dataset)
-            arm_scores_list = []
-            i = 0
-            for ob_df in ob_dfs:
-                arm_scores_list.append(all_arm_scores[i : i + len(ob_df)])
-                i += len(ob_df)
+            arm_scores_list = [
+                all_arm_scores[start:end]
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
         else:
             arm_scores_list = [
                 agent.bandit.calculate_scores(arm_indices, arm_contexts)
@@ -891,6 +901,12 @@ class SupervisedModelTraining(TorchModelTraining):
         if hasattr(self, "_creating_index_mapping"):
             del self._creating_index_mapping
 
+        if hasattr(self, "_scoring_trial"):
+            del self._scoring_trial
+
+        if hasattr(self, "_scoring_trial_module"):
+            del self._scoring_trial_module
+
         gc.collect()
 
     def _save_test_set_predictions(self, agent: BanditAgent) -> None:
@@ -931,9 +947,7 @@ class SupervisedModelTraining(TorchModelTraining):
             sorted_actions_list.append(sorted_actions)
             proba_actions_list.append(proba_actions)
 
-        action_scores_list = [
-            list(reversed(sorted(action_scores))) for action_scores in arm_scores_list
-        ]
+        action_scores_list = _sort_scores_descending(arm_scores_list)
 
         del obs
 
@@ -960,6 +974,17 @@ class SupervisedModelTraining(TorchModelTraining):
             self._save_test_set_predictions(self.create_agent())
 
 
+def _sort_scores_descending(scores_list: List[List[float]]) -> List[List[float]]:
+    # Pad every list with -inf to a (n, max_len) matrix so all of them can be
+    # sorted by a single np.sort call and trimmed back to their original length
+    padded_scores, lengths = pad_lists(scores_list, fill_value=-np.inf)
+    sorted_scores = -np.sort(-padded_scores, axis=1)
+
+    return [
+        scores[:length].tolist() for scores, length in zip(sorted_scores, lengths)
+    ]
+
+
 def load_torch_model_training_from_task_dir(
     model_cls: Type[TorchModelTraining], task_dir: str
 ) -> TorchModelTraining:
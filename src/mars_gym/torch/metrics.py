@@ -1,4 +1,5 @@
-from typing import Sequence
+import weakref
+from typing import Sequence, Tuple
 
 import torch
 import torchbearer
@@ -7,6 +8,65 @@ from torchbearer.metrics import default_for_key, running_mean, mean
 import torch.nn.functional as F
 
 
+def _positive_counts(
+    y_pred: torch.Tensor, y_true: torch.Tensor, threshold: float
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Return the true positive, predicted positive and actual positive counts.
+    A sparse y_true is read only at its stored entries instead of densified."""
+    y_pred = y_pred.float() > threshold
+
+    if y_true.layout == torch.sparse_coo and threshold >= 0:
+        # Implicit zeros are never above a non-negative threshold
+        y_true = y_true.coalesce()
+        positives = y_true._values().float() > threshold
+        tp = y_pred[tuple(y_true._indices())][positives].sum()
+        actual_positives = positives.sum()
+    else:
+        if y_true.layout == torch.sparse_coo:
+            y_true = y_true.to_dense()
+        y_true = y_true.float() > threshold
+        tp = (y_true & y_pred).sum()
+        actual_positives = y_true.sum()
+
+    return (
+        tp.to(torch.float32),
+        y_pred.sum().to(torch.float32),
+        actual_positives.to(torch.float32),
+    )
+
+
+# Assumes the metrics run on a single thread, one batch at a time (as torchbearer
+# does), so the last batch seen is the only one worth remembering
+_last_positive_counts = None
+
+
+def _cached_positive_counts(
+    y_pred: torch.Tensor, y_true: torch.Tensor, threshold: float
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """_positive_counts computed once per batch: precision, recall and f1_score
+    receive the same y_pred/y_true tensors, so the first of them to run does the
+    pass over the batch and the others reuse its counts."""
+    global _last_positive_counts
+    if _last_positive_counts is not None:
+        y_pred_ref, y_true_ref, cached_threshold, counts = _last_positive_counts
+        if (
+            y_pred_ref() is y_pred
+            and y_true_ref() is y_true
+            and cached_threshold == threshold
+        ):
+            return counts
+
+    counts = _positive_counts(y_pred, y_true, threshold)
+    # Weak references, so the cache never keeps a finished batch alive
+    _last_positive_counts = (
+        weakref.ref(y_pred),
+        weakref.ref(y_true),
+        threshold,
+        counts,
+    )
+    return counts
+
+
 @metrics.default_for_key("bce")
 @running_mean
 @mean
@@ -34,8 +94,8 @@ def binary_accuracy(
     if y_true.layout == torch.sparse_coo:
         y_true = y_true.to_dense()
 
-    y_pred = (y_pred.float() > threshold).long()
-    y_true = (y_true.float() > threshold).long()
+    y_pred = y_pred.float() > threshold
+    y_true = y_true.float() > threshold
 
     return torch.eq(y_pred, y_true).view(-1).float()
 
@@ -49,23 +109,15 @@ def precision(
 ):
     if isinstance(y_true, Sequence) and isinstance(y_pred, torch.Tensor):
         y_true = y_true[0]
-    if y_true.layout == torch.sparse_coo:
-        y_true = y_true.to_dense()
-
-    y_pred = (y_pred.float() > threshold).float()
-    y_true = (y_true.float() > threshold).float()
 
-    # true_positive = (y_pred * y_true).sum(dim=-1)
-    # return true_positive.div(y_pred.sum(dim=-1).add(eps))
-
-    tp = (y_true * y_pred).sum().to(torch.float32)
-    tn = ((1 - y_true) * (1 - y_pred)).sum().to(torch.float32)
-    fp = ((1 - y_true) * y_pred).sum().to(torch.float32)
-    fn = (y_true * (1 - y_pred)).sum().to(torch.float32)
+    # tp + fp is the number of predicted positives
+    tp, predicted_positives, _ = _cached_positive_counts(
+        y_pred, y_true, threshold
+    )
 
     epsilon = 1e-7
 
-    precision = tp / (tp + fp + epsilon)
+    precision = tp / (predicted_positives + epsilon)
 
     return precision
 
@@ -79,19 +131,13 @@ def recall(
 ):
     if isinstance(y_true, Sequence) and isinstance(y_pred, torch.Tensor):
         y_true = y_true[0]
-    if y_true.layout == torch.sparse_coo:
-        y_true = y_true.to_dense()
-    y_pred = (y_pred.float() > threshold).float()
-    y_true = (y_true.float() > threshold).float()
 
-    tp = (y_true * y_pred).sum().to(torch.float32)
-    tn = ((1 - y_true) * (1 - y_pred)).sum().to(torch.float32)
-    fp = ((1 - y_true) * y_pred).sum().to(torch.float32)
-    fn = (y_true * (1 - y_pred)).sum().to(torch.float32)
+    # tp + fn is the number of actual positives
+    tp, _, actual_positives = _cached_positive_counts(y_pred, y_true, threshold)
 
     epsilon = 1e-7
 
-    recall = tp / (tp + fn + epsilon)
+    recall = tp / (actual_positives + epsilon)
 
     return recall
 
@@ -105,20 +151,15 @@ def f1_score(
 ):
     if isinstance(y_true, Sequence) and isinstance(y_pred, torch.Tensor):
         y_true = y_true[0]
-    if y_true.layout == torch.sparse_coo:
-        y_true = y_true.to_dense()
-    y_pred = (y_pred.float() > threshold).float()
-    y_true = (y_true.float() > threshold).float()
 
-    tp = (y_true * y_pred).sum().to(torch.float32)
-    tn = ((1 - y_true) * (1 - y_pred)).sum().to(torch.float32)
-    fp = ((1 - y_true) * y_pred).sum().to(torch.float32)
-    fn = (y_true * (1 - y_pred)).sum().to(torch.float32)
+    tp, predicted_positives, actual_positives = _cached_positive_counts(
+        y_pred, y_true, threshold
+    )
 
     epsilon = 1e-7
 
-    precision = tp / (tp + fp + epsilon)
-    recall = tp / (tp + fn + epsilon)
+    precision = tp / (predicted_positives + epsilon)
+    recall = tp / (actual_positives + epsilon)
 
     f1 = 2 * (precision * recall) / (precision + recall + epsilon)
 
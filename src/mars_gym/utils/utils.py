@@ -100,6 +100,17 @@ def literal_eval_if_str(element):
     return element
 
 
+def fast_literal_eval_if_str(element):
+    # json's C decoder handles the numeric lists written by DataFrame.to_csv much
+    # faster than ast; anything else (quoted strings, tuples...) falls back to ast
+    if isinstance(element, str):
+        try:
+            return json.loads(element)
+        except ValueError:
+            return ast.literal_eval(element)
+    return element
+
+
 def _pad_sequence(seq, pad) -> np.ndarray:
     if seq is None:
         return None
@@ -107,6 +118,20 @@ def _pad_sequence(seq, pad) -> np.ndarray:
         return (([0] * pad) + seq)[-pad:]
 
 
+def pad_lists(
+    lists: List[list], fill_value: float = 0, dtype: type = np.float64
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack variable-length lists into a (len(lists), max_len) array filled with
+    fill_value after the end of each list. Also returns the original lengths."""
+    lengths = np.array([len(values) for values in lists], dtype=np.int64)
+    max_length = lengths.max() if len(lengths) else 0
+    padded = np.full((len(lengths), max_length), fill_value, dtype=dtype)
+    padded[np.arange(max_length) < lengths[:, None]] = [
+        value for values in lists for value in values
+    ]
+    return padded, lengths
+
+
 def to_array(xs):
     return (
         [
@@ -125,9 +150,11 @@ def _parallel_literal_eval(
 ) -> list:
     
     if use_tqdm:
-        return list(tqdm(pool.map(literal_eval_if_str, series), total=len(series)))
+        return list(
+            tqdm(pool.map(fast_literal_eval_if_str, series), total=len(series))
+        )
     else:
-        return pool.map(literal_eval_if_str, series)
+        return pool.map(fast_literal_eval_if_str, series)
 
 
 def date_to_day_of_week(date: str) -> int:
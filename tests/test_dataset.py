@@ -7,7 +7,11 @@ import luigi
 from unittest.mock import patch
 import shutil
 
+from mars_gym.data.dataset import (
+    InteractionsWithNegativeItemGenerationByAvailableItemsDataset,
+)
 from mars_gym.data.utils import DownloadDataset
+from mars_gym.meta_config import ProjectConfig, Column, IOType
 
 
 @patch("mars_gym.utils.files.OUTPUT_PATH", "tests/output")
@@ -27,5 +31,55 @@ class TestDataset(unittest.TestCase):
         luigi.build([job], local_scheduler=True)
 
 
+class TestInteractionsWithNegativeItemGenerationByAvailableItemsDataset(
+    unittest.TestCase
+):
+    def setUp(self):
+        self.project_config = ProjectConfig(
+            base_dir=os.path.join("tests", "output", "test"),
+            prepare_data_frames_task=None,
+            dataset_class=InteractionsWithNegativeItemGenerationByAvailableItemsDataset,
+            user_column=Column("user", IOType.INDEXABLE),
+            item_column=Column("item", IOType.INDEXABLE),
+            other_input_columns=[],
+            output_column=Column("reward", IOType.NUMBER),
+            available_arms_column_name="available_arms",
+        )
+        self.data_frame = pd.DataFrame(
+            {
+                "user": [0, 1, 2, 3],
+                "item": [0, 2, 4, 1],
+                "reward": [1.0, 1.0, 1.0, 1.0],
+                "available_arms": [
+                    ["a", "b", "c"],
+                    ["c", "d"],
+                    ["a", "b", "c", "d", "e"],
+                    ["a", "b"],
+                ],
+            }
+        )
+        self.index_mapping = {"item": {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}}
+        self.available_items = [{0, 1, 2}, {2, 3}, {0, 1, 2, 3, 4}, {0, 1}]
+
+    def test_negative_items_come_from_available_items(self):
+        dataset = InteractionsWithNegativeItemGenerationByAvailableItemsDataset(
+            self.data_frame,
+            None,
+            self.project_config,
+            self.index_mapping,
+            negative_proportion=0.8,
+        )
+        n = len(self.data_frame)
+        indices = list(range(n, len(dataset))) * 50
+
+        (_, items), output = dataset[indices]
+
+        self.assertTrue((output == 0).all())
+        for index, item in zip(indices, items):
+            row = index % n
+            self.assertIn(item, self.available_items[row])
+            self.assertNotEqual(item, self.data_frame["item"][row])
+
+
 if __name__ == "__main__":
     unittest.main()
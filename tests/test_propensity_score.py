@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from mars_gym.evaluation.propensity_score import _get_ps_from_probas
+from mars_gym.evaluation.task import _ps_policy_eval
+
+
+def _get_ps_from_probas_per_row(item_idx, probas, available_item_indices=None):
+    probas = probas.copy()
+    if available_item_indices:
+        probas /= np.sum(probas[available_item_indices])
+    return probas[item_idx]
+
+
+def _ps_policy_eval_per_row(relevance_list, prob_actions):
+    return np.sum(
+        np.array(relevance_list) * np.array(prob_actions[: len(relevance_list)])
+    ).tolist()
+
+
+class TestPropensityScoreKernels(unittest.TestCase):
+    def setUp(self):
+        self.probas = np.random.RandomState(42).rand(5, 6).astype(np.float32)
+        self.item_indices = np.array([0, 3, 5, 2, 1])
+        self.available_item_indices_list = [
+            [0, 1, 2],
+            [3],
+            [],
+            [5, 2, 4, 0, 1, 3],
+            [],
+        ]
+
+    def test_get_ps_from_probas(self):
+        expected = [
+            _get_ps_from_probas_per_row(item_idx, probas)
+            for item_idx, probas in zip(self.item_indices, self.probas)
+        ]
+
+        np.testing.assert_allclose(
+            _get_ps_from_probas(self.item_indices, self.probas), expected, rtol=1e-6
+        )
+
+    def test_get_ps_from_probas_with_available_items(self):
+        expected = [
+            _get_ps_from_probas_per_row(item_idx, probas, available_item_indices)
+            for item_idx, probas, available_item_indices in zip(
+                self.item_indices, self.probas, self.available_item_indices_list
+            )
+        ]
+
+        np.testing.assert_allclose(
+            _get_ps_from_probas(
+                self.item_indices, self.probas, self.available_item_indices_list
+            ),
+            expected,
+            rtol=1e-6,
+        )
+
+    def test_get_ps_from_probas_without_any_available_items(self):
+        available_item_indices_list = [[] for _ in self.item_indices]
+
+        np.testing.assert_allclose(
+            _get_ps_from_probas(
+                self.item_indices, self.probas, available_item_indices_list
+            ),
+            self.probas[np.arange(len(self.probas)), self.item_indices],
+        )
+
+    def test_ps_policy_eval(self):
+        relevance_lists = [[0, 1, 0], [1], [0, 0, 0, 0], [1, 0]]
+        prob_actions_list = [
+            [0.5, 0.3, 0.2, 0.0],
+            [0.9, 0.1],
+            [0.25, 0.25, 0.25, 0.25],
+            [0.6, 0.4],
+        ]
+        expected = [
+            _ps_policy_eval_per_row(relevance_list, prob_actions)
+            for relevance_list, prob_actions in zip(relevance_lists, prob_actions_list)
+        ]
+
+        np.testing.assert_allclose(
+            _ps_policy_eval(relevance_lists, prob_actions_list), expected
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
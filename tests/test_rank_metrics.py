@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from mars_gym.evaluation.metrics.rank import (
+    average_precision,
+    average_precision_batch,
+    ndcg_at_k,
+    ndcg_at_k_batch,
+    precision_at_k,
+    precision_at_k_batch,
+    reciprocal_rank_at_k,
+    reciprocal_rank_batch,
+)
+from mars_gym.utils.utils import pad_lists
+
+
+class TestRankMetricsBatch(unittest.TestCase):
+    def setUp(self):
+        self.relevance_lists = [
+            [0, 0, 1, 0, 0],
+            [1, 0, 0],
+            [0, 0, 0, 0],
+            [1, 1, 0, 1, 0, 1, 0, 0, 0, 1],
+            [0, 1],
+        ]
+        self.relevances, _ = pad_lists(self.relevance_lists, dtype=np.int8)
+
+    def test_average_precision_batch(self):
+        np.testing.assert_allclose(
+            average_precision_batch(self.relevances),
+            [average_precision(r) for r in self.relevance_lists],
+        )
+
+    def test_reciprocal_rank_batch(self):
+        np.testing.assert_allclose(
+            reciprocal_rank_batch(self.relevances),
+            [reciprocal_rank_at_k(r, len(r)) for r in self.relevance_lists],
+        )
+
+    def test_precision_at_k_batch(self):
+        np.testing.assert_allclose(
+            precision_at_k_batch(self.relevances, 1),
+            [precision_at_k(r, 1) for r in self.relevance_lists],
+        )
+
+    def test_ndcg_at_k_batch(self):
+        for k in (1, 3, 5, 20):
+            for method in (0, 1):
+                np.testing.assert_allclose(
+                    ndcg_at_k_batch(self.relevances, k, method),
+                    [ndcg_at_k(r, k, method) for r in self.relevance_lists],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import pandas as pd
+
+from mars_gym.evaluation.task import _create_relevance_lists
+
+
+def _create_relevance_list_per_row(sorted_actions, expected_action):
+    return [1 if str(action) == str(expected_action) else 0 for action in sorted_actions]
+
+
+class TestCreateRelevanceLists(unittest.TestCase):
+    def _assert_matches_per_row(self, sorted_actions_list, expected_actions):
+        expected = [
+            _create_relevance_list_per_row(sorted_actions, expected_action)
+            for sorted_actions, expected_action in zip(
+                sorted_actions_list, list(expected_actions)
+            )
+        ]
+
+        self.assertEqual(
+            _create_relevance_lists(sorted_actions_list, expected_actions), expected
+        )
+
+    def test_int_ids(self):
+        self._assert_matches_per_row(
+            [[1, 2, 3], [3, 2, 1], [4, 5]], pd.Series([2, 1, 6])
+        )
+
+    def test_empty_rankings(self):
+        self._assert_matches_per_row([[1, 2], [], [3]], [2, 5, 3])
+        self._assert_matches_per_row([[], []], [1, 2])
+        self.assertEqual(_create_relevance_lists([], []), [])
+
+    def test_mixed_int_and_str_ids(self):
+        self._assert_matches_per_row(
+            [["a", "1", 1], [10, "10", "b"], ["x"]], ["1", 10, "y"]
+        )
+
+    def test_float_looking_ids(self):
+        self._assert_matches_per_row(
+            [["a", "1", 1.0], [1.0, 2.5, "2.5"], [3.0, 3]],
+            ["1", 2.5, 3.0],
+        )
+        self._assert_matches_per_row(
+            [[1.0, 2.0], [3.5, 0.1]], pd.Series([2.0, 0.1])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
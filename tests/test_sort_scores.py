@@ -0,0 +1,25 @@
+import unittest
+
+from mars_gym.simulation.training import _sort_scores_descending
+
+
+class TestSortScoresDescending(unittest.TestCase):
+    def _assert_matches_sorted(self, scores_list):
+        self.assertEqual(
+            _sort_scores_descending(scores_list),
+            [list(reversed(sorted(scores))) for scores in scores_list],
+        )
+
+    def test_ragged_lists(self):
+        self._assert_matches_sorted(
+            [[0.1, 0.5, 0.3], [2.0], [1.0, -1.0, 0.0, -3.5], [0.2, 0.2]]
+        )
+
+    def test_empty_lists(self):
+        self._assert_matches_sorted([[0.4, 0.9], [], [0.7]])
+        self._assert_matches_sorted([[], []])
+        self.assertEqual(_sort_scores_descending([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
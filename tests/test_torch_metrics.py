@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import patch
+
+import torch
+import torchbearer
+from torchbearer.metrics import MetricList
+
+from mars_gym.torch import metrics
+from mars_gym.torch.metrics import _positive_counts
+
+
+def _precision_recall_f1(tp, predicted_positives, actual_positives):
+    epsilon = 1e-7
+    precision = tp / (predicted_positives + epsilon)
+    recall = tp / (actual_positives + epsilon)
+    f1 = 2 * (precision * recall) / (precision + recall + epsilon)
+    return torch.stack([precision, recall, f1])
+
+
+class TestPositiveCounts(unittest.TestCase):
+    def setUp(self):
+        self.y_pred = torch.tensor(
+            [
+                [0.9, 0.2, 0.7, -0.3, 0.0],
+                [0.1, 0.8, -0.9, 0.6, 0.4],
+                [0.0, 0.0, 0.95, 0.3, -0.6],
+            ]
+        )
+        indices = torch.tensor([[0, 0, 1, 1, 2, 2, 2], [0, 3, 1, 4, 2, 3, 0]])
+        # Includes an explicitly stored zero and negative values
+        values = torch.tensor([1.0, -1.0, 1.0, 0.0, 0.6, 1.0, 0.2])
+        self.y_true_sparse = torch.sparse_coo_tensor(indices, values, (3, 5))
+        self.y_true_dense = self.y_true_sparse.to_dense()
+
+    def _assert_sparse_matches_dense(self, threshold):
+        sparse_counts = _positive_counts(self.y_pred, self.y_true_sparse, threshold)
+        dense_counts = _positive_counts(self.y_pred, self.y_true_dense, threshold)
+
+        for sparse_count, dense_count in zip(sparse_counts, dense_counts):
+            self.assertEqual(sparse_count.item(), dense_count.item())
+        self.assertTrue(
+            torch.allclose(
+                _precision_recall_f1(*sparse_counts),
+                _precision_recall_f1(*dense_counts),
+            )
+        )
+
+    def test_sparse_matches_dense_with_zero_threshold(self):
+        self._assert_sparse_matches_dense(0.0)
+
+    def test_sparse_matches_dense_with_positive_threshold(self):
+        self._assert_sparse_matches_dense(0.5)
+
+    def test_sparse_matches_dense_with_negative_threshold(self):
+        self._assert_sparse_matches_dense(-0.5)
+
+    def test_sparse_with_duplicate_entries(self):
+        indices = torch.tensor([[0, 0, 1], [2, 2, 1]])
+        values = torch.tensor([0.3, 0.4, 1.0])
+        y_true = torch.sparse_coo_tensor(indices, values, (3, 5))
+
+        sparse_counts = _positive_counts(self.y_pred, y_true, 0.5)
+        dense_counts = _positive_counts(self.y_pred, y_true.to_dense(), 0.5)
+
+        for sparse_count, dense_count in zip(sparse_counts, dense_counts):
+            self.assertEqual(sparse_count.item(), dense_count.item())
+
+
+class TestCachedPositiveCounts(unittest.TestCase):
+    def setUp(self):
+        metrics._last_positive_counts = None
+        self.y_pred = torch.tensor([[0.9, 0.2, 0.7], [0.1, 0.8, 0.6]])
+        self.y_true = torch.tensor([[1.0, 0.0, 0.0], [0.0, 1.0, 1.0]])
+
+    def tearDown(self):
+        metrics._last_positive_counts = None
+
+    def _process(self, metric_list, y_pred, y_true):
+        return metric_list.process(
+            {torchbearer.Y_PRED: y_pred, torchbearer.Y_TRUE: y_true}
+        )
+
+    def test_precision_recall_and_f1_share_one_pass_per_batch(self):
+        metric_list = MetricList([metrics.precision, metrics.recall, metrics.f1_score])
+        metric_list.reset({})
+
+        with patch(
+            "mars_gym.torch.metrics._positive_counts", side_effect=_positive_counts
+        ) as positive_counts:
+            self._process(metric_list, self.y_pred, self.y_true)
+            self.assertEqual(positive_counts.call_count, 1)
+
+            self._process(metric_list, self.y_pred.clone(), self.y_true)
+            self.assertEqual(positive_counts.call_count, 2)
+
+            self._process(metric_list, self.y_pred, self.y_true.clone())
+            self.assertEqual(positive_counts.call_count, 3)
+
+    def test_recomputes_for_new_tensors_or_threshold(self):
+        with patch(
+            "mars_gym.torch.metrics._positive_counts", side_effect=_positive_counts
+        ) as positive_counts:
+            counts = metrics._cached_positive_counts(self.y_pred, self.y_true, 0.5)
+            self.assertIs(
+                metrics._cached_positive_counts(self.y_pred, self.y_true, 0.5), counts
+            )
+            self.assertEqual(positive_counts.call_count, 1)
+
+            metrics._cached_positive_counts(self.y_pred, self.y_true, 0.0)
+            self.assertEqual(positive_counts.call_count, 2)
+
+            y_pred = self.y_pred.clone()
+            metrics._cached_positive_counts(y_pred, self.y_true, 0.0)
+            self.assertEqual(positive_counts.call_count, 3)
+
+    def test_cached_counts_match_direct_computation(self):
+        y_pred = torch.tensor([[0.9, 0.2, 0.7], [0.1, 0.8, 0.6]])
+        metrics._cached_positive_counts(self.y_pred, self.y_true, 0.5)
+
+        for cached_count, count in zip(
+            metrics._cached_positive_counts(y_pred, self.y_true, 0.5),
+            _positive_counts(y_pred, self.y_true, 0.5),
+        ):
+            self.assertEqual(cached_count.item(), count.item())
+
+
+if __name__ == "__main__":
+    unittest.main()